@@ -13,14 +13,67 @@ from __future__ import print_function
 import gui.mode
 import gui.freehand
 import math
+from collections import namedtuple
 
 from gi.repository import Gdk
+from gi.repository import GLib
 
 from gettext import gettext as _
 
 import gui.overlays
 
 
+## Constants
+
+#: Smallest handle distance, in model units, used when deriving a radius.
+#: Keeps math.log() defined when the handle is dragged onto the center.
+_MIN_HANDLE_DISTANCE = 1e-3
+
+
+## Helpers
+
+_CursorPrefs = namedtuple("_CursorPrefs", [
+    "line_width_inner",
+    "line_width_outer",
+    "col_fg",
+    "col_bg",
+    "inset",
+])
+
+_CURSOR_PREFS_CACHE = {}
+
+
+def _load_cursor_prefs(prefs):
+    """Get the parsed freehand cursor outline prefs, memoized
+
+    The preferences dialog rewrites all of the outline settings
+    whenever it changes the cursor style, so the style is part of the
+    cache key along with the identity of the prefs dict.
+    """
+    key = (id(prefs), prefs.get("cursor.freehand.style"))
+    cached = _CURSOR_PREFS_CACHE.get(key)
+    if cached is not None:
+        return cached
+    cached = _CursorPrefs(
+        line_width_inner = float(
+            prefs.get("cursor.freehand.inner_line_width", 1.25)
+        ),
+        line_width_outer = float(
+            prefs.get("cursor.freehand.outer_line_width", 1.25)
+        ),
+        col_fg = tuple(
+            prefs.get("cursor.freehand.outer_line_color", (0, 0, 0, 1))
+        ),
+        col_bg = tuple(
+            prefs.get("cursor.freehand.inner_line_color", (1, 1, 1, 0.75))
+        ),
+        inset = int(prefs.get("cursor.freehand.inner_line_inset", 2)),
+    )
+    _CURSOR_PREFS_CACHE.clear()
+    _CURSOR_PREFS_CACHE[key] = cached
+    return cached
+
+
 ## Class defs
 
 class BrushSizeOverlay(gui.overlays.Overlay):
@@ -35,21 +88,16 @@ class BrushSizeOverlay(gui.overlays.Overlay):
         self._hx = handle_x
         self._hy = handle_y
         self._radius = radius
-        self._oldradius = 0
-        prefs = doc.app.preferences
-        self.line_width_inner = float(
-            prefs.get("cursor.freehand.inner_line_width", 1.25)
-        )
-        self.line_width_outer = float(
-            prefs.get("cursor.freehand.outer_line_width", 1.25)
-        )
-        self.col_fg = tuple(
-            prefs.get("cursor.freehand.outer_line_color", (0, 0, 0, 1))
-        )
-        self.col_bg = tuple(
-            prefs.get("cursor.freehand.inner_line_color", (1, 1, 1, 0.75))
-        )
-        self.inset = int(prefs.get("cursor.freehand.inner_line_inset", 2))
+        self._r_px = math.exp(radius) * tdw.scale
+        cursor_prefs = _load_cursor_prefs(doc.app.preferences)
+        self.line_width_inner = cursor_prefs.line_width_inner
+        self.line_width_outer = cursor_prefs.line_width_outer
+        self.col_fg = cursor_prefs.col_fg
+        self.col_bg = cursor_prefs.col_bg
+        self.inset = cursor_prefs.inset
+        self._ring_paths = None
+        self._ring_radius = None
+        self._handle_paths = None
         tdw.display_overlays.append(self)
         self._queue_tdw_redraw()
 
@@ -58,47 +106,135 @@ class BrushSizeOverlay(gui.overlays.Overlay):
         self._queue_tdw_redraw()
 
     def _queue_tdw_redraw(self):
-        area = self._get_area()
-        self._tdw.queue_draw_area(*area)
-
-    def _get_area(self):
-        r = math.exp(max(self._radius, self._oldradius)) * self._tdw.scale + 5
-        linew = self.line_width_outer
-        x = self._x - r - 2 * linew - 20
-        y = self._y - r - 2 * linew - 20
-        size = 2 * (r + 2 * linew + 20)
-        return (x, y, size, size + 20)
+        """Queue a redraw of the whole overlay"""
+        self._queue_ring_redraw(self._r_px, self._r_px)
+        self._tdw.queue_draw_area(*self._handle_bbox(self._hx, self._hy))
+
+    def _ring_margin(self):
+        """Distance either side of the radius which the outlines touch"""
+        return self.line_width_outer + self.inset + self.line_width_inner + 2
+
+    def _queue_ring_redraw(self, r_min, r_max):
+        """Queue a redraw of the annulus swept between two radii
+
+        The annulus is covered by four strips around the square inscribed
+        in its inner circle, so the unchanged middle of the circle
+        is not invalidated.
+        """
+        margin = self._ring_margin()
+        r_outer = int(math.ceil(r_max + margin))
+        r_inner = max(0.0, r_min - margin)
+        s = int(r_inner / math.sqrt(2))
+        x = self._x
+        y = self._y
+        queue_draw_area = self._tdw.queue_draw_area
+        if s <= 0:
+            queue_draw_area(x - r_outer, y - r_outer, 2*r_outer, 2*r_outer)
+            return
+        band = r_outer - s
+        queue_draw_area(x - r_outer, y - r_outer, 2*r_outer, band)
+        queue_draw_area(x - r_outer, y + s, 2*r_outer, band)
+        queue_draw_area(x - r_outer, y - s, band, 2*s)
+        queue_draw_area(x + s, y - s, band, 2*s)
+
+    def _handle_bbox(self, hx, hy):
+        """Bounding box of the drag handle dot"""
+        return (int(hx) - 4, int(hy) - 4, 9, 9)
 
     def update(self, radius, handle_x, handle_y):
-        self._oldradius = self._radius
+        r_px_old = self._r_px
+        hx_old = self._hx
+        hy_old = self._hy
         self._radius = radius
+        self._r_px = math.exp(radius) * self._tdw.scale
         self._hx = handle_x
         self._hy = handle_y
-        self._queue_tdw_redraw()
+        self._queue_ring_redraw(
+            min(r_px_old, self._r_px),
+            max(r_px_old, self._r_px),
+        )
+        queue_draw_area = self._tdw.queue_draw_area
+        queue_draw_area(*self._handle_bbox(hx_old, hy_old))
+        queue_draw_area(*self._handle_bbox(handle_x, handle_y))
 
-    def paint(self, cr):
+    def _build_ring_paths(self, cr):
+        """Build the outer and inner outline paths for the current radius"""
         cx = self._x
         cy = self._y
+        r0 = self._r_px
+        paths = []
+        for r in (r0 - self.line_width_outer / 2.0,
+                  r0 - self.inset + self.line_width_inner / 2.0):
+            cr.new_path()
+            cr.arc(cx, cy, r, 0, math.pi*2)
+            paths.append(cr.copy_path())
+        cr.new_path()
+        return tuple(paths)
+
+    def _build_handle_paths(self, cr):
+        """Build the handle dot's paths, centered on the origin"""
+        paths = []
+        for r in (3, 2):
+            cr.new_path()
+            cr.arc(0, 0, r, 0, 2 * math.pi)
+            paths.append(cr.copy_path())
+        cr.new_path()
+        return tuple(paths)
 
-        r0 = math.exp(self._radius) * self._tdw.scale
-        r = r0 - self.line_width_outer / 2.0
-        cr.set_source_rgba(*self.col_fg)
-        cr.set_line_width(self.line_width_outer)
-        cr.arc(cx, cy, r, 0, math.pi*2)
-        cr.stroke()
-
-        r = r0 - self.inset + self.line_width_inner / 2.0
-        cr.set_source_rgba(*self.col_bg)
-        cr.set_line_width(self.line_width_inner)
-        cr.arc(cx, cy, r, 0, math.pi*2)
-        cr.stroke()
+    def paint(self, cr):
+        # The outline paths only change with the radius, and the handle
+        # dot's never change, so they are tessellated once and replayed.
+        if self._ring_paths is None or self._ring_radius != self._radius:
+            self._ring_paths = self._build_ring_paths(cr)
+            self._ring_radius = self._radius
+        if self._handle_paths is None:
+            self._handle_paths = self._build_handle_paths(cr)
+        outer_path, inner_path = self._ring_paths
+        handle_outer_path, handle_inner_path = self._handle_paths
+
+        # Skip whatever lies outside the area being exposed.
+        # The ring is invisible if the clip is beyond its bbox,
+        # or entirely within the square inscribed in its hole.
+        clip_x1, clip_y1, clip_x2, clip_y2 = cr.clip_extents()
+        cx = self._x
+        cy = self._y
+        margin = self._ring_margin()
+        r = self._r_px + margin
+        s = max(0.0, self._r_px - margin) / math.sqrt(2)
+        ring_visible = not (
+            clip_x2 < cx - r or clip_x1 > cx + r
+            or clip_y2 < cy - r or clip_y1 > cy + r
+            or (cx - s < clip_x1 and clip_x2 < cx + s
+                and cy - s < clip_y1 and clip_y2 < cy + s)
+        )
+        hx1, hy1, hw, hh = self._handle_bbox(self._hx, self._hy)
+        handle_visible = not (
+            clip_x2 < hx1 or clip_x1 > hx1 + hw
+            or clip_y2 < hy1 or clip_y1 > hy1 + hh
+        )
 
+        if ring_visible:
+            cr.set_source_rgba(*self.col_fg)
+            cr.set_line_width(self.line_width_outer)
+            cr.append_path(outer_path)
+            cr.stroke()
+
+            cr.set_source_rgba(*self.col_bg)
+            cr.set_line_width(self.line_width_inner)
+            cr.append_path(inner_path)
+            cr.stroke()
+
+        if not handle_visible:
+            return
+        cr.save()
+        cr.translate(self._hx, self._hy)
         cr.set_source_rgba(*self.col_fg)
-        cr.arc(self._hx, self._hy, 3, 0, 2 * math.pi)
+        cr.append_path(handle_outer_path)
         cr.fill()
         cr.set_source_rgba(*self.col_bg)
-        cr.arc(self._hx, self._hy, 2, 0, 2 * math.pi)
+        cr.append_path(handle_inner_path)
         cr.fill()
+        cr.restore()
 
 
 class BrushResizeMode(gui.mode.OneshotDragMode):
@@ -107,6 +243,7 @@ class BrushResizeMode(gui.mode.OneshotDragMode):
 
     ACTION_NAME = 'BrushResizeMode'
     _OPTIONS_WIDGET = None
+    _BLANK_CURSOR = None
 
     pointer_behavior = gui.mode.Behavior.EDIT_OBJECTS
     supports_button_switching = True
@@ -126,8 +263,12 @@ class BrushResizeMode(gui.mode.OneshotDragMode):
 
     @property
     def active_cursor(self):
-        ctype = Gdk.CursorType.BLANK_CURSOR
-        return Gdk.Cursor.new(ctype)
+        """Get the (class singleton) blank cursor"""
+        cls = self.__class__
+        if cls._BLANK_CURSOR is None:
+            ctype = Gdk.CursorType.BLANK_CURSOR
+            cls._BLANK_CURSOR = Gdk.Cursor.new(ctype)
+        return cls._BLANK_CURSOR
 
     def enter(self, doc, **kwds):
         super(BrushResizeMode, self).enter(doc, **kwds)
@@ -145,26 +286,86 @@ class BrushResizeMode(gui.mode.OneshotDragMode):
         self.overlay = BrushSizeOverlay(
             doc, doc.tdw, x, y, radius, self.handle_x, self.handle_y
         )
+        self._pending_dx = 0.0
+        self._pending_dy = 0.0
+        self._pending_tdw = None
+        self._flush_srcid = None
+        self._pending_radius = None
+        self._radius_tick_id = None
+        self._last_update = (radius, self.handle_x, self.handle_y)
+        self._tdw = tdw
+        self._inv_scale = 1.0 / tdw.scale
+        tdw.transformation_updated += self._transformation_updated_cb
 
     def leave(self, **kwds):
+        if self._flush_srcid is not None:
+            GLib.source_remove(self._flush_srcid)
+            self._flush_idle_cb()
+        if self._radius_tick_id is not None:
+            self._tdw.remove_tick_callback(self._radius_tick_id)
+            self._apply_radius_tick_cb(self._tdw, None)
+        self._tdw.transformation_updated -= self._transformation_updated_cb
+        self._tdw = None
         self.overlay.cleanup()
         self.overlay = None
 
+    def _transformation_updated_cb(self, *args):
+        self._inv_scale = 1.0 / self._tdw.scale
+
     def drag_update_cb(self, tdw, event, dx, dy):
-        adj = tdw.app.brush_adjustment['radius_logarithmic']
+        # Motion is accumulated and applied at most once per idle cycle
+        self._pending_dx += dx
+        self._pending_dy += dy
+        self._pending_tdw = tdw
+        if self._flush_srcid is None:
+            self._flush_srcid = GLib.idle_add(self._flush_idle_cb)
+        return super(BrushResizeMode, self).drag_update_cb(tdw, event, dx, dy)
 
-        self.handle_x += dx * 0.5
-        self.handle_y += dy * 0.5
+    def _flush_idle_cb(self):
+        """Apply the motion accumulated since the last flush"""
+        self._flush_srcid = None
+        tdw = self._pending_tdw
+        if tdw is None or self.overlay is None:
+            return False
+
+        self.handle_x += self._pending_dx * 0.5
+        self.handle_y += self._pending_dy * 0.5
+        self._pending_dx = 0.0
+        self._pending_dy = 0.0
 
         dx = self.handle_x - self.x_orig
         dy = self.handle_y - self.y_orig
 
-        dst = math.sqrt(dx**2 + dy**2) * (1 / tdw.scale)
-        newradius = math.log(dst)
-        adj.set_value(newradius)
+        dst = math.hypot(dx, dy) * self._inv_scale
+        newradius = math.log(dst if dst > _MIN_HANDLE_DISTANCE
+                             else _MIN_HANDLE_DISTANCE)
+        last_radius, last_hx, last_hy = self._last_update
+        if (abs(newradius - last_radius) <= 1e-3
+                and abs(self.handle_x - last_hx) <= 0.5
+                and abs(self.handle_y - last_hy) <= 0.5):
+            # Sub-pixel motion: nothing would visibly change
+            return False
+        self._last_update = (newradius, self.handle_x, self.handle_y)
         self.overlay.update(newradius, self.handle_x, self.handle_y)
 
-        return super(BrushResizeMode, self).drag_update_cb(tdw, event, dx, dy)
+        # The adjustment's listeners reconfigure the brush, so only
+        # set its value once per frame.
+        self._pending_radius = newradius
+        if self._radius_tick_id is None:
+            self._radius_tick_id = tdw.add_tick_callback(
+                self._apply_radius_tick_cb,
+            )
+        return False
+
+    def _apply_radius_tick_cb(self, tdw, frame_clock):
+        """Set the radius adjustment to the latest value, once per frame"""
+        self._radius_tick_id = None
+        newradius = self._pending_radius
+        self._pending_radius = None
+        if newradius is not None:
+            adj = tdw.app.brush_adjustment['radius_logarithmic']
+            adj.set_value(newradius)
+        return GLib.SOURCE_REMOVE
 
     def get_options_widget(self):
         """Get the (class singleton) options widget"""
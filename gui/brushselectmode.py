@@ -14,6 +14,9 @@ from __future__ import print_function
 
 import gui.mode
 import math
+import weakref
+
+import numpy as np
 
 from gettext import gettext as _
 
@@ -27,6 +30,29 @@ import cairo
 import gui.overlays
 
 
+## Helpers
+
+# Scaled copies of brush preview pixbufs, keyed weakly on the original.
+# Managed brushes keep their preview pixbuf until it is replaced,
+# so entries stay valid for as long as they can be looked up.
+_SCALED_PREVIEWS = weakref.WeakKeyDictionary()
+
+
+def _scaled_preview(pixbuf, size):
+    """Get a square scaled version of a preview pixbuf, cached"""
+    scaled_by_size = _SCALED_PREVIEWS.get(pixbuf)
+    if scaled_by_size is None:
+        scaled_by_size = {}
+        _SCALED_PREVIEWS[pixbuf] = scaled_by_size
+    scaled = scaled_by_size.get(size)
+    if scaled is None:
+        scaled = pixbuf.scale_simple(
+            size, size, GdkPixbuf.InterpType.BILINEAR
+        )
+        scaled_by_size[size] = scaled
+    return scaled
+
+
 ## Class defs
 
 class BrushSelectOverlay(gui.overlays.Overlay):
@@ -37,6 +63,11 @@ class BrushSelectOverlay(gui.overlays.Overlay):
     OUTLINE_WIDTH_ACTIVE = 5
     OUTLINE_WIDTH_INACTIVE = 2
     RADIUS_FULL = RADIUS_INNER + RADIUS_OUTER + OUTLINE_WIDTH_ACTIVE
+    _RADIUS_MID = RADIUS_INNER + RADIUS_OUTER / 2
+    _OUTER_HALF = RADIUS_OUTER / 2
+    _RADIUS_RING_OUTER = RADIUS_INNER + RADIUS_OUTER
+    _R_IN2 = RADIUS_INNER**2
+    _R_OUT2 = _RADIUS_RING_OUTER**2
 
     def __init__(self, doc, tdw, x, y, selected, history):
         super(BrushSelectOverlay, self).__init__()
@@ -44,18 +75,28 @@ class BrushSelectOverlay(gui.overlays.Overlay):
         self._x = x
         self._y = y
         w = self.RADIUS_INNER * 2
-        self._selBuffer = selected.copy().scale_simple(
+        self._selBuffer = selected.scale_simple(
             w, w, GdkPixbuf.InterpType.BILINEAR
         )
-        self._historyBuffers = []
         self.numHist = len(history)
-        for i in history:
-            hw = self.RADIUS_OUTER
-            self._historyBuffers.append(
-                i.copy().scale_simple(hw, hw, GdkPixbuf.InterpType.BILINEAR)
-            )
+        hw = self.RADIUS_OUTER
+        self._historyBuffers = [_scaled_preview(i, hw) for i in history]
+        # Centers of each slice's preview, and a preview mask
+        # centered on the origin, moved into place for each slice.
+        n = max(1, self.numHist)
+        mid_angles = np.linspace(0, 2 * np.pi, n, endpoint=False) + np.pi / n
+        self._slice_cx = (x + np.cos(mid_angles) * self._RADIUS_MID).tolist()
+        self._slice_cy = (y + np.sin(mid_angles) * self._RADIUS_MID).tolist()
+        outerhalf = self._OUTER_HALF
+        self._slice_mask = cairo.RadialGradient(
+            0, 0, outerhalf * 0.6, 0, 0, outerhalf * 0.9
+        )
+        self._slice_mask.add_color_stop_rgba(0, 1, 1, 1, 1)
+        self._slice_mask.add_color_stop_rgba(1, 1, 1, 1, 0)
         tdw.display_overlays.append(self)
         self._active = None
+        self._cache = None
+        self._rebuild_cache()
         self._queue_tdw_redraw()
 
     def cleanup(self):
@@ -72,19 +113,47 @@ class BrushSelectOverlay(gui.overlays.Overlay):
 
     def set_active(self, active):
         self._active = active
+        self._rebuild_cache()
         self._queue_tdw_redraw()
 
+    def _rebuild_cache(self):
+        """Render the whole overlay to an offscreen surface
+
+        The rendering only changes when the active slice does,
+        so exposes can just blit the cached surface.
+        """
+        r_full = self.RADIUS_FULL
+        surf = cairo.ImageSurface(cairo.FORMAT_ARGB32, r_full*2, r_full*2)
+        cr = cairo.Context(surf)
+        cr.translate(r_full - self._x, r_full - self._y)
+        self._paint_overlay(cr)
+        surf.flush()
+        self._cache = surf
+
     def any_selected(self, x, y):
-        dst = math.sqrt((x - self._x)**2 + (y - self._y)**2)
-        return (dst > self.RADIUS_INNER and
-                dst < self.RADIUS_INNER + self.RADIUS_OUTER)
+        dx = x - self._x
+        dy = y - self._y
+        d2 = dx*dx + dy*dy
+        return self._R_IN2 < d2 < self._R_OUT2
 
     def paint(self, cr):
-        angle = 2 * math.pi / self.numHist
-        for i, hbuf in zip(range(0, self.numHist), self._historyBuffers):
-            self.paint_slice(
-                cr, i * angle, (i+1) * angle, hbuf, i == self._active
-            )
+        r_full = self.RADIUS_FULL
+        x = self._x
+        y = self._y
+        clip_x1, clip_y1, clip_x2, clip_y2 = cr.clip_extents()
+        if (clip_x2 < x - r_full or clip_x1 > x + r_full
+                or clip_y2 < y - r_full or clip_y1 > y + r_full):
+            return
+        cr.set_source_surface(self._cache, self._x - r_full, self._y - r_full)
+        cr.paint()
+
+    def _paint_overlay(self, cr):
+        if self.numHist > 0:
+            angle = 2 * math.pi / self.numHist
+        paint_slice = self.paint_slice
+        active = self._active
+        for i, hbuf in enumerate(self._historyBuffers):
+            paint_slice(cr, i, i * angle, (i+1) * angle, hbuf, i == active)
 
         def_active = self._active is None
 
@@ -112,19 +181,15 @@ class BrushSelectOverlay(gui.overlays.Overlay):
         cr.pop_group_to_source()
         cr.paint_with_alpha(1 if def_active else 0.75)
 
-    def paint_slice(self, cr, angle_s, angle_e, prevImg, active):
+    def paint_slice(self, cr, i, angle_s, angle_e, prevImg, active):
         x = self._x
         y = self._y
-        mid_angle = angle_s + (angle_e - angle_s)/2
-        cx = x + math.cos(mid_angle)*(self.RADIUS_INNER + self.RADIUS_OUTER/2)
-        cy = y + math.sin(mid_angle)*(self.RADIUS_INNER + self.RADIUS_OUTER/2)
-        outerhalf = self.RADIUS_OUTER / 2
+        cx = self._slice_cx[i]
+        cy = self._slice_cy[i]
+        outerhalf = self._OUTER_HALF
 
-        mask_grad = cairo.RadialGradient(
-            cx, cy, outerhalf * 0.6, cx, cy, outerhalf * 0.9
-        )
-        mask_grad.add_color_stop_rgba(0, 1, 1, 1, 1)
-        mask_grad.add_color_stop_rgba(1, 1, 1, 1, 0)
+        mask_grad = self._slice_mask
+        mask_grad.set_matrix(cairo.Matrix(x0=-cx, y0=-cy))
 
         cr.push_group()
         if active:
@@ -132,9 +197,7 @@ class BrushSelectOverlay(gui.overlays.Overlay):
         else:
             cr.set_source_rgb(0.9, 0.9, 0.9)
         cr.arc(x, y, self.RADIUS_INNER, angle_s, angle_e)
-        cr.arc_negative(
-            x, y, self.RADIUS_INNER + self.RADIUS_OUTER, angle_e, angle_s
-        )
+        cr.arc_negative(x, y, self._RADIUS_RING_OUTER, angle_e, angle_s)
         cr.close_path()
         cr.fill_preserve()
         cr.clip()
@@ -186,15 +249,17 @@ class BrushSelectMode(gui.mode.OneshotDragMode):
         self.bm = bm = app.brushmanager
         currentBrush = bm.selected_brush
         cBrushName = currentBrush.get_display_name()
-        self.history = list(filter(
-            lambda mb: mb.get_display_name() != cBrushName,
-            bm.history
-        ))
+        self.history = [
+            mb for mb in bm.history
+            if mb.get_display_name() != cBrushName
+        ]
         self.histLength = len(self.history)
+        self._inv_slice = self.histLength / (2 * math.pi)
+        self._last_idx = None
         self.x, self.y = self.current_position()
         self.selected = None
         sel_prev = currentBrush.preview
-        hist_prevs = list(map(lambda mb: mb.preview, self.history))
+        hist_prevs = [mb.preview for mb in self.history]
         self._overlay = BrushSelectOverlay(
             doc, doc.tdw, self.x, self.y, sel_prev, hist_prevs
         )
@@ -206,17 +271,20 @@ class BrushSelectMode(gui.mode.OneshotDragMode):
             self.bm.select_brush(self.selected)
 
     def drag_update_cb(self, tdw, event, dx, dy):
-        if (self._overlay.any_selected(event.x, event.y)):
+        if self.histLength and self._overlay.any_selected(event.x, event.y):
             # Pointer is inside the outer overlay circle
             angle = math.atan2(event.y - self.y, event.x - self.x)
-            slice_radians = (2 * math.pi) / self.histLength
-            idx = (angle // slice_radians) % self.histLength
-            selected = self.history[int(idx)]
-            if self.selected != selected:
-                self.selected = selected
+            # The angle is within [-pi, pi], so offsetting by a full turn
+            # of slices makes int() truncation equivalent to flooring.
+            n = self.histLength
+            idx = int(angle * self._inv_slice + n) % n
+            if idx != self._last_idx:
+                self._last_idx = idx
+                self.selected = self.history[idx]
                 self._overlay.set_active(idx)
         elif self.selected is not None:
             # Only update when a new brush is selected
             self.selected = None
+            self._last_idx = None
             self._overlay.set_active(None)
         return super(BrushSelectMode, self).drag_update_cb(tdw, event, dx, dy)
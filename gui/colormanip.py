@@ -12,6 +12,8 @@
 ## Imports
 from __future__ import print_function
 
+from gi.repository import GLib
+
 import gui.mode
 from gui.colorpicker import ColorPickPreviewOverlay
 
@@ -32,25 +34,57 @@ class ColorAdjustMode(gui.mode.OneshotDragMode):
         self._overlay = None
         self._started_from_key_press = ignore_modifiers
         self._start_drag_on_next_motion_event = False
+        self._pending_drag = None
+        self._flush_srcid = None
 
     def enter(self, doc, **kwds):
         """Enters the mode, arranging for necessary grabs ASAP"""
         super(ColorAdjustMode, self).enter(doc, **kwds)
 
     def leave(self, **kwds):
+        if self._flush_srcid is not None:
+            GLib.source_remove(self._flush_srcid)
+            self._flush_idle_cb()
         self._remove_overlay()
         super(ColorAdjustMode, self).leave(**kwds)
 
     def drag_update_cb(self, tdw, event, dx, dy):
-        self._place_overlay(tdw, event.x, event.y)
+        if self._overlay is None:
+            self._place_overlay(tdw, event.x, event.y)
+
+    def _queue_drag(self, tdw, event, dx, dy):
+        """Accumulate motion, to be applied once per idle cycle
+
+        Subclasses apply the accumulated motion in `_apply_drag()`.
+        """
+        if self._pending_drag is None:
+            self._pending_drag = [tdw, event.x, event.y, dx, dy]
+        else:
+            pending = self._pending_drag
+            pending[0:3] = [tdw, event.x, event.y]
+            pending[3] += dx
+            pending[4] += dy
+        if self._flush_srcid is None:
+            self._flush_srcid = GLib.idle_add(self._flush_idle_cb)
+
+    def _flush_idle_cb(self):
+        self._flush_srcid = None
+        pending = self._pending_drag
+        self._pending_drag = None
+        if pending is not None:
+            self._apply_drag(*pending)
+        return False
+
+    def _apply_drag(self, tdw, x, y, dx, dy):
+        """Adjust the color for accumulated motion ending at (x, y)"""
+        pass
 
     def _place_overlay(self, tdw, x, y):
-        if self._overlay is None:
-            cx, cy = tdw.get_center()
-            # Consistency with color picker preview
-            self._overlay = ColorPickPreviewOverlay(
-                self.doc, tdw, cx, cy - ColorPickPreviewOverlay.PREVIEW_SIZE
-            )
+        cx, cy = tdw.get_center()
+        # Consistency with color picker preview
+        self._overlay = ColorPickPreviewOverlay(
+            self.doc, tdw, cx, cy - ColorPickPreviewOverlay.PREVIEW_SIZE
+        )
 
     def _remove_overlay(self):
         if self._overlay is None:
@@ -90,15 +124,17 @@ class HueAdjustMode(ColorAdjustMode):
         return None
 
     def drag_update_cb(self, tdw, event, dx, dy):
-        x, y = event.x, event.y
+        self._queue_drag(tdw, event, dx, dy)
+        super(HueAdjustMode, self).drag_update_cb(tdw, event, dx, dy)
+
+    def _apply_drag(self, tdw, x, y, dx, dy):
         cx, cy = tdw.get_center()
         x, y = x - cx, y - cy
-        phi2 = math.atan2(y, x)
-        x, y = x - dx, y - dy
-        phi1 = math.atan2(y, x)
-        ds = ((phi2 - phi1) / (2 * math.pi))
+        x0, y0 = x - dx, y - dy
+        # Signed angle swept around the center, from one atan2() call
+        phi = math.atan2(x0 * y - y0 * x, x0 * x + y0 * y)
+        ds = phi / (2 * math.pi)
         self.doc.offset_brush_hue(ds)
-        super(HueAdjustMode, self).drag_update_cb(tdw, event, dx, dy)
 
 
 class HueSatValAdjustMode(ColorAdjustMode):
@@ -134,6 +170,10 @@ class HueSatValAdjustMode(ColorAdjustMode):
         return None
 
     def drag_update_cb(self, tdw, event, dx, dy):
+        self._queue_drag(tdw, event, dx, dy)
+        super(HueSatValAdjustMode, self).drag_update_cb(tdw, event, dx, dy)
+
+    def _apply_drag(self, tdw, x, y, dx, dy):
         ratioLim = 1.8
 
         if dx == 0 or abs(dy / dx) > ratioLim:  # Up/Down - Brightness
@@ -141,6 +181,5 @@ class HueSatValAdjustMode(ColorAdjustMode):
         elif dy == 0 or abs(dx / dy) > ratioLim:  # Right/Left - Saturation
             self.doc.offset_brush_saturation(dx/700)
         else:  # Diagonals - Hue
-            d = math.copysign(math.sqrt(dx**2+dy**2), dy)
+            d = math.copysign(math.hypot(dx, dy), dy)
             self.doc.offset_brush_hue(-(d / 1000))
-        super(HueSatValAdjustMode, self).drag_update_cb(tdw, event, dx, dy)
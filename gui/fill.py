@@ -76,9 +76,12 @@ class FloodFillMode (
 
     _current_cursor = (False, _CURSOR_FILL_NORMAL)
     _tdws = None
+    _last_motion = None
     _fill_permitted = True
     _x = None
     _y = None
+    _update_ui_srcid = None
+    _last_ui_inputs = None
 
     @property
     def active_cursor(self):
@@ -90,9 +93,15 @@ class FloodFillMode (
 
     @property
     def cursor(self):
-        gc_on, name = self._current_cursor
-        action_name = self.GC_ACTION_NAME if gc_on else self.ACTION_NAME
-        return self.app.cursors.get_action_cursor(action_name, name)
+        # Only a handful of (gap closing, name) combinations are possible
+        key = self._current_cursor
+        cursor = self._cursors.get(key)
+        if cursor is None:
+            gc_on, name = key
+            action_name = self.GC_ACTION_NAME if gc_on else self.ACTION_NAME
+            cursor = self.app.cursors.get_action_cursor(action_name, name)
+            self._cursors[key] = cursor
+        return cursor
 
     def get_current_cursor(self):
         return self._MODE_CURSORS[self.bm.active_mode.mode_type]
@@ -101,18 +110,23 @@ class FloodFillMode (
 
     def enter(self, doc, **kwds):
         super(FloodFillMode, self).enter(doc, **kwds)
-        self._tdws = set([self.doc.tdw])
+        # Weak, so TDWs of closed windows aren't kept alive by the mode
+        self._tdws = weakref.WeakSet([self.doc.tdw])
         self.app.blendmodemanager.register(self.bm)
         rootstack = self.doc.model.layer_stack
-        rootstack.current_path_updated += self._update_ui
-        rootstack.layer_properties_changed += self._update_ui
-        self._update_ui()
+        rootstack.current_path_updated += self._layer_stack_changed_cb
+        rootstack.layer_properties_changed += self._layer_stack_changed_cb
+        self._update_ui(force=True)
 
     def leave(self, **kwds):
+        if self._update_ui_srcid is not None:
+            GLib.source_remove(self._update_ui_srcid)
+            self._update_ui_srcid = None
+        self._last_motion = None
         self.app.blendmodemanager.deregister(self.bm)
         rootstack = self.doc.model.layer_stack
-        rootstack.current_path_updated -= self._update_ui
-        rootstack.layer_properties_changed -= self._update_ui
+        rootstack.current_path_updated -= self._layer_stack_changed_cb
+        rootstack.layer_properties_changed -= self._layer_stack_changed_cb
         return super(FloodFillMode, self).leave(**kwds)
 
     @classmethod
@@ -132,8 +146,11 @@ class FloodFillMode (
 
     def __init__(self, ignore_modifiers=False, **kwds):
         super(FloodFillMode, self).__init__(**kwds)
+        # The options widget is a class singleton, so keep a handle on it
         opts = self.get_options_widget()
+        self._opts = opts
         self._current_cursor = (opts.gap_closing, self._CURSOR_FILL_NORMAL)
+        self._cursors = {}
         from gui.application import get_app
         self.app = get_app()
         self.bm = self.get_blend_modes()
@@ -148,7 +165,7 @@ class FloodFillMode (
 
     def update_blend_mode(self, mode_manager, old_mode, new_mode):
         if old_mode is not new_mode:
-            self._update_cursor(self.get_options_widget())
+            self._update_cursor(self._opts)
 
     def drag_update_cb(self, tdw, event, dx, dy):
         """Add pixel coordinate to seed set (if not there already)"""
@@ -209,7 +226,7 @@ class FloodFillMode (
         self._tdws.add(tdw)
         self._update_ui()
         color = self.doc.app.brush_color_manager.get_color()
-        opts = self.get_options_widget()
+        opts = self._opts
         make_new_layer = opts.make_new_layer
         rootstack = tdw.doc.layer_stack
         if not rootstack.current.get_fillable():
@@ -255,32 +272,66 @@ class FloodFillMode (
 
     def motion_notify_cb(self, tdw, event):
         """Track position, and update cursor"""
+        # The renderer drops its cached matrix whenever the view changes,
+        # so the same event position under the same matrix maps to the
+        # same model position and needs no conversion or UI update.
+        matrix = tdw.renderer.cached_transformation_matrix
+        key = (tdw, event.x, event.y, matrix)
+        if matrix is not None and key == self._last_motion:
+            return super(FloodFillMode, self).motion_notify_cb(tdw, event)
         x, y = tdw.display_to_model(event.x, event.y)
+        self._last_motion = (
+            tdw, event.x, event.y, tdw.renderer.cached_transformation_matrix
+        )
         self._x = x
         self._y = y
         self._tdws.add(tdw)
-        self._update_ui()
+        # Many motion events can arrive per frame: update once for all
+        if self._update_ui_srcid is None:
+            self._update_ui_srcid = GLib.idle_add(self._update_ui_idle_cb)
         return super(FloodFillMode, self).motion_notify_cb(tdw, event)
 
-    def _update_ui(self, *_ignored):
-        """Updates the UI from the model"""
+    def _update_ui_idle_cb(self):
+        self._update_ui_srcid = None
+        self._update_ui()
+        return False
+
+    def _layer_stack_changed_cb(self, *_ignored):
+        """Updates the UI when the current layer or its properties change"""
+        self._update_ui(force=True)
+
+    def _update_ui(self, force=False):
+        """Updates the UI from the model
+
+        :param bool force: update even if the inputs look unchanged
+
+        The update is skipped if the position, target layer, frame and
+        gap closing flag are the same as last time. Callers reacting to
+        changes in the layers themselves must force the update.
+        """
         x, y = self._x, self._y
         if None in (x, y):
             x, y = self.current_position()
         model = self.doc.model
 
         # Determine which layer will receive the fill based on the options
-        opts = self.get_options_widget()
+        opts = self._opts
         target_layer = model.layer_stack.current
         if opts.make_new_layer:
             target_layer = None
 
+        frame = tuple(model.get_frame()) if model.frame_enabled else None
+        inputs = (x, y, id(target_layer), frame, opts.gap_closing)
+        if not force and inputs == self._last_ui_inputs:
+            return
+        self._last_ui_inputs = inputs
+
         # Determine whether the target layer can be filled
         permitted = True
         if target_layer is not None:
             permitted = target_layer.visible and not target_layer.locked
-        if permitted and model.frame_enabled:
-            fx1, fy1, fw, fh = model.get_frame()
+        if permitted and frame is not None:
+            fx1, fy1, fw, fh = frame
             fx2, fy2 = fx1+fw, fy1+fh
             permitted = fx1 <= x < fx2 and fy1 <= y < fy2
         self._fill_permitted = permitted
@@ -495,6 +546,7 @@ class FloodFillOptionsWidget (Gtk.Grid):
     def __init__(self):
         Gtk.Grid.__init__(self)
 
+        self._gap_closing_options = None
         self.set_row_spacing(6)
         self.set_column_spacing(6)
         from gui.application import get_app
@@ -933,11 +985,13 @@ class FloodFillOptionsWidget (Gtk.Grid):
 
     @property
     def gap_closing_options(self):
-        if self.gap_closing:
-            return lib.floodfill.GapClosingOptions(
-                self.max_gap_size, self.retract_seeps)
-        else:
+        if not self.gap_closing:
             return None
+        # Cached until one of the gap closing settings changes
+        if self._gap_closing_options is None:
+            self._gap_closing_options = lib.floodfill.GapClosingOptions(
+                self.max_gap_size, self.retract_seeps)
+        return self._gap_closing_options
 
     def _tolerance_changed_cb(self, adj):
         self.app.preferences[self.TOLERANCE_PREF] = self.tolerance
@@ -959,13 +1013,16 @@ class FloodFillOptionsWidget (Gtk.Grid):
         self.app.preferences[self.FEATHER_PREF] = self.feather
 
     def _gap_closing_toggled_cb(self, adj):
+        self._gap_closing_options = None
         self._gap_closing_grid.set_sensitive(self.gap_closing)
         self.app.preferences[self.GAP_CLOSING_PREF] = self.gap_closing
 
     def _max_gap_size_changed_cb(self, adj):
+        self._gap_closing_options = None
         self.app.preferences[self.GAP_SIZE_PREF] = self.max_gap_size
 
     def _retract_seeps_toggled_cb(self, adj):
+        self._gap_closing_options = None
         self.app.preferences[self.RETRACT_SEEPS_PREF] = self.retract_seeps
 
     def _bm_combo_changed_cb(self, combo):
@@ -980,12 +1037,11 @@ class FloodFillOptionsWidget (Gtk.Grid):
         if layer and self._prev_src_layer and self._prev_src_layer() is layer:
             # Restore previous selection layer
             combo = self._src_combo
-            for entry in combo.get_model():
-                if entry[2] is layer:
-                    # Don't trigger callback
-                    with combo.handler_block(self._src_combo_cb_id):
-                        combo.set_active_iter(entry.iter)
-                    return
+            row_iter = self.src_list.get_layer_iter(layer)
+            if row_iter is not None:
+                # Don't trigger callback
+                with combo.handler_block(self._src_combo_cb_id):
+                    combo.set_active_iter(row_iter)
 
     def _src_combo_changed_cb(self, combo):
         """Track the last selected choice of layer to maintain
@@ -1023,6 +1079,9 @@ class FloodFillOptionsWidget (Gtk.Grid):
 class FlatLayerList(Gtk.ListStore):
     """Stores a flattened copy of the layer tree"""
 
+    # Index of the first layer row, after the default option and separator
+    _FIRST_LAYER_ROW = 2
+
     def __init__(self, root_stack):
         super(FlatLayerList, self).__init__()
 
@@ -1031,6 +1090,9 @@ class FlatLayerList(Gtk.ListStore):
         root_stack.layer_deleted += self._layer_deleted_cb
 
         self.root = root_stack
+        # Row iters by id(layer). ListStore iters persist for as long
+        # as their rows exist, so they stay valid across other changes.
+        self._layer_iters = {}
         # Column data : name, layer_path, layer
         self.set_column_types((str, object, object))
         default_selection = C_(
@@ -1041,16 +1103,18 @@ class FlatLayerList(Gtk.ListStore):
         self.append((default_selection, None, None))
         self.append((None, None, None))
         # Flatten layer tree into rows
-        for layer in root_stack:
-            self._initalize(layer)
+        self._initialize(root_stack)
+
+    def get_layer_iter(self, layer):
+        """Get the iter of the row for a layer, or None if there is none"""
+        return self._layer_iters.get(id(layer))
 
     def _layer_props_changed_cb(self, root, layerpath, layer, changed):
         """Update copies of layer names when changed"""
         if 'name' in changed:
-            for item in self:
-                if item[1] == layerpath:
-                    item[0] = layer.name
-                    return
+            row_iter = self._layer_iters.get(id(layer))
+            if row_iter is not None:
+                self[row_iter][0] = layer.name
 
     def _layer_inserted_cb(self, root, path):
         """Create a row for the inserted layer and update
@@ -1058,15 +1122,15 @@ class FlatLayerList(Gtk.ListStore):
         """
         layer = root.deepget(path)
         new_row = (layer.name, path, layer)
-        for item in self:
-            item_path = item[1]
-            if item_path and path <= item_path:
-                row_iter = item.iter
-                self.insert_before(row_iter, new_row)
-                self._update_paths(row_iter)
-                return
+        index = self._bisect_path(path)
+        if index < len(self):
+            row_iter = self[index].iter
+            new_iter = self.insert_before(row_iter, new_row)
+            self._layer_iters[id(layer)] = new_iter
+            self._update_paths(row_iter, path, 1)
+            return
         # If layer added to bottom, no other updates necessary
-        self.append(new_row)
+        self._layer_iters[id(layer)] = self.append(new_row)
 
     def _layer_deleted_cb(self, root, path):
         """Remove the row for the deleted layer, and also any
@@ -1075,36 +1139,73 @@ class FlatLayerList(Gtk.ListStore):
         def is_child(p):
             return lib.layer.path_startswith(p, path)
 
-        for item in self:
-            if item[1] == path:
-                row = item.iter
-                # Remove rows for all children
-                while self.remove(row) and is_child(self[row][1]):
-                    pass
-                # Update rows (if any) below last deleted
-                if self.iter_is_valid(row):
-                    self._update_paths(row)
-                return
+        index = self._bisect_path(path)
+        if index >= len(self):
+            return
+        item = self[index]
+        if item[1] != path:
+            return
+        row = item.iter
+        # Remove rows for all children
+        self._layer_iters.pop(id(item[2]), None)
+        while self.remove(row) and is_child(self[row][1]):
+            self._layer_iters.pop(id(self[row][2]), None)
+        # Update rows (if any) below last deleted
+        if self.iter_is_valid(row):
+            self._update_paths(row, path, -1)
+
+    def _bisect_path(self, path):
+        """Index of the first layer row with a path not less than `path`
+
+        The layer rows follow the default option and separator rows in
+        depth-first order, which is also the sort order of their paths,
+        so the row can be found by bisection instead of a linear scan.
+        """
+        lo = self._FIRST_LAYER_ROW
+        hi = len(self)
+        path = tuple(path)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid][1] < path:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _update_paths(self, row_iter, path, delta):
+        """Shift the paths of rows after an insertion or deletion
+
+        :param row_iter: first row after the inserted/deleted layer
+        :param path: path of the inserted/deleted layer
+        :param delta: 1 for an insertion, -1 for a deletion
 
-    def _update_paths(self, row_iter):
-        """Update the paths for existing layers
-        at or below the point of the given iterator
+        Only the later siblings of the layer at `path`, and their
+        descendants, change paths: their index at that depth moves by
+        `delta`. Rows are in depth-first order, so those rows directly
+        follow `row_iter`, and the first row outside the parent stack
+        ends the run.
         """
+        depth = len(path) - 1
+        parent = tuple(path[:depth])
         while row_iter:
             item = self[row_iter]
-            path = self.root.deepindex(item[2])
-            if path is not None:
-                item[1] = path
+            item_path = item[1]
+            if len(item_path) <= depth or item_path[:depth] != parent:
+                break
+            item[1] = (
+                item_path[:depth]
+                + (item_path[depth] + delta,)
+                + item_path[depth+1:]
+            )
             row_iter = self.iter_next(row_iter)
 
-    def _initalize(self, layer):
-        """Add a new row for the layer (unless it is the root)
-        Subtrees are added recursively, depth-first traversal.
+    def _initialize(self, root_stack):
+        """Add rows for every layer below the root
+
+        Rows are added in a single depth-first walk of the tree, which
+        yields the paths too: no per-layer deepindex() search is needed.
         """
-        # if layer is not self.root:
-        name = layer.name
-        path = self.root.deepindex(layer)
-        self.append((name, path, layer))
-        if isinstance(layer, lib.layer.LayerStack):
-            for child in layer:
-                self._initalize(child)
+        layer_iters = self._layer_iters
+        append = self.append
+        for path, layer in root_stack.walk():
+            layer_iters[id(layer)] = append((layer.name, path, layer))
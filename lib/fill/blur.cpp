@@ -10,6 +10,7 @@
 #include "blur.hpp"
 #include "fill_constants.hpp"
 
+#include <algorithm>
 #include <cmath>
 
 // Generate gaussian multiplicands used for blurring.
@@ -84,27 +85,38 @@ GaussBlurrer::blur(bool can_update, GridVector input_grid)
     // Create output buffer
     PixelBuffer<chan_t> out_buf = new_alpha_tile();
 
+    // Both passes accumulate a full row at a time, keeping the innermost
+    // loops contiguous so that the compiler can vectorize them.
+    fix15_t blurred[N];
+
     // Blur each row from input to intermediate buffer
     for (int y = 0; y < N + 2 * r; ++y) {
-        for (int x = 0; x < N; ++x) {
-            fix15_t blurred = 0;
-            for (int xoffs = -r; xoffs < r + 1; xoffs++) {
-                fix15_t in = input_full[y][x + xoffs + r];
-                blurred += fix15_mul(in, factors[xoffs + r]);
+        const chan_t* in_row = input_full[y];
+        std::fill(blurred, blurred + N, 0);
+        for (int xoffs = -r; xoffs < r + 1; xoffs++) {
+            const chan_t* in = in_row + xoffs + r;
+            const fix15_t factor = factors[xoffs + r];
+            for (int x = 0; x < N; ++x) {
+                blurred[x] += fix15_mul(in[x], factor);
             }
-            input_vertical[y][x] = fix15_short_clamp(blurred);
+        }
+        for (int x = 0; x < N; ++x) {
+            input_vertical[y][x] = fix15_short_clamp(blurred[x]);
         }
     }
 
     // Blur each column from intermediate to output buffer
-    for (int x = 0; x < N; ++x) {
-        for (int y = 0; y < N; ++y) {
-            fix15_t blurred = 0;
-            for (int yoffs = -r; yoffs < r + 1; yoffs++) {
-                fix15_t in = input_vertical[y + yoffs + r][x];
-                blurred += fix15_mul(in, factors[yoffs + r]);
+    for (int y = 0; y < N; ++y) {
+        std::fill(blurred, blurred + N, 0);
+        for (int yoffs = -r; yoffs < r + 1; yoffs++) {
+            const chan_t* in = input_vertical[y + yoffs + r];
+            const fix15_t factor = factors[yoffs + r];
+            for (int x = 0; x < N; ++x) {
+                blurred[x] += fix15_mul(in[x], factor);
             }
-            out_buf(x, y) = fix15_short_clamp(blurred);
+        }
+        for (int x = 0; x < N; ++x) {
+            out_buf(x, y) = fix15_short_clamp(blurred[x]);
         }
     }
 
@@ -146,7 +158,7 @@ blur_strand(
     bool can_update = false;
     PyObject* tile_coord;
     while (status_controller.running() && strand.pop(tile_coord)) {
-        GridVector grid = nine_grid(tile_coord, tiles);
+        GridVector grid = nine_grid(tile_coord, tiles, can_update);
 
         PyObject* result = bucket.blur(can_update, grid);
         can_update = true;
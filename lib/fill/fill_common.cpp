@@ -95,7 +95,7 @@ copy_rectangular_slice(
 }
 
 GridVector
-nine_grid(PyObject* tile_coord, AtomicDict& tiles)
+nine_grid(PyObject* tile_coord, AtomicDict& tiles, bool from_above)
 {
     const int num_tiles = 9;
     const int offs[]{-1, 0, 1};
@@ -107,8 +107,18 @@ nine_grid(PyObject* tile_coord, AtomicDict& tiles)
 
     PyArg_ParseTuple(tile_coord, "ii", &x, &y);
     std::vector<PixelBuffer<chan_t>> grid;
+    grid.reserve(num_tiles);
 
-    for (int i = 0; i < num_tiles; ++i) {
+    // The top row is not read when updating from the tile above,
+    // so skip building coordinates and looking up tiles for it.
+    int first = 0;
+    if (from_above) {
+        for (; first < 3; ++first)
+            grid.push_back(
+                PixelBuffer<chan_t>(ConstTiles::ALPHA_TRANSPARENT()));
+    }
+
+    for (int i = first; i < num_tiles; ++i) {
         int _x = x + offs[i % 3];
         int _y = y + offs[i / 3];
         PyObject* c = Py_BuildValue("ii", _x, _y);
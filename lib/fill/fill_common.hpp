@@ -195,46 +195,74 @@ class PixelBuffer
 PixelBuffer<chan_t> new_alpha_tile();
 
 /*
-  GIL-safe queue for strands used by worker processes
+  A strand is a sequence of vertically contiguous tile coordinates
+  e.g. {(3, 4), (3, 5), (3, 6)}
 
-  This structure wraps a python list and provides an
-  access-only interface that can be called from multiple
-  threads.
+  This structure wraps a python list of coordinates and provides an
+  access-only interface. A strand is only ever read by the worker that
+  popped it from the strand queue, and the list is never modified while
+  the workers run, so no locking is needed (nor the GIL, since reading
+  list items does not touch any reference counts).
 
   WARNING: The list reference is borrowed, not owned!
   It is up to the user to ensure that the list is not garbage
   collected during the lifetime of any wrapper using it.
 */
-template <typename T>
-class AtomicQueue
+class Strand
+{
+  public:
+    // Create an empty strand (for declarations)
+    Strand() : items(NULL), index(0), num_items(0) {}
+    // Create a strand from a pointer to a PyList.
+    explicit Strand(PyObject* items)
+        : items(items), index(0), num_items(PyList_GET_SIZE(items))
+    {
+    }
+    bool pop(PyObject*& item)
+    {
+        if (index >= num_items) return false;
+        item = PyList_GET_ITEM(items, index);
+        ++index;
+        return true;
+    }
+    // Get the number of coordinates in the strand
+    Py_ssize_t size() { return num_items; }
+
+  private:
+    PyObject* items;
+    Py_ssize_t index;
+    Py_ssize_t num_items;
+};
+
+/*
+  Threadsafe queue for strands used by worker processes
+
+  This structure wraps a python list and provides an access-only
+  interface that can be called from multiple threads. Like the
+  Controller, it uses its own mutex instead of the GIL, so that
+  workers do not have to wait for activity in the GUI thread.
+
+  WARNING: The list reference is borrowed, not owned!
+  It is up to the user to ensure that the list is not garbage
+  collected during the lifetime of any wrapper using it.
+*/
+class StrandQueue
 {
   public:
-    // Create an empty queue (for declarations)
-    explicit AtomicQueue() {}
     // Create a queue from a pointer to a PyList.
-    explicit AtomicQueue(PyObject* items)
+    explicit StrandQueue(PyObject* items)
+        : items(items), index(0), num_strands(PyList_GET_SIZE(items))
     {
-        PyGILState_STATE gstate = PyGILState_Ensure();
-        index = 0;
-        num_strands = PyList_GET_SIZE(items);
-        this->items = items;
-        PyGILState_Release(gstate);
     }
     // Prevent copy construction (all workers should share it)
-    AtomicQueue(AtomicQueue&) = delete;
-    bool pop(T& item)
+    StrandQueue(StrandQueue&) = delete;
+    bool pop(Strand& item)
     {
-        PyGILState_STATE gstate;
-        gstate = PyGILState_Ensure();
-        if (index >= num_strands) {
-            PyGILState_Release(gstate);
-            return false;
-        } else {
-            item = T(PyList_GET_ITEM(items, index));
-            ++index;
-            PyGILState_Release(gstate);
-            return true;
-        }
+        std::lock_guard<std::mutex> lock(pop_mutex);
+        if (index >= num_strands) return false;
+        item = Strand(PyList_GET_ITEM(items, index));
+        ++index;
+        return true;
     }
     // Get the size of the queue
     Py_ssize_t size() { return num_strands; }
@@ -243,15 +271,9 @@ class AtomicQueue
     PyObject* items;
     Py_ssize_t index;
     Py_ssize_t num_strands;
+    std::mutex pop_mutex;
 };
 
-/*
-  A strand is a sequence of vertically contiguous tile coordinates
-  e.g. {(3, 4), (3, 5), (3, 6)}
-*/
-using Strand = AtomicQueue<PyObject*>;
-using StrandQueue = AtomicQueue<Strand>;
-
 /*
   GIL-threadsafe PyDict wrapper
 
@@ -298,9 +320,14 @@ typedef std::vector<PixelBuffer<chan_t>> GridVector;
   0 1 2
   3 4 5
   6 7 8
+
+  If from_above is true, the tiles of the top row (0, 1, 2) are not
+  looked up, and the constant empty alpha tile is used in their place.
+  This is only valid when the grid is used to update an input array
+  from the grid of the tile directly above (see init_from_nine_grid).
 */
 GridVector
-nine_grid(PyObject* tile_coord, AtomicDict& tiles);
+nine_grid(PyObject* tile_coord, AtomicDict& tiles, bool from_above = false);
 
 /*
    Read sections from a nine-grid of tiles to a single array
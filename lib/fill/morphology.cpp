@@ -303,7 +303,7 @@ morph_strand(
 
     PyObject* tile_coord;
     while (status_controller.running() && strand.pop(tile_coord)) {
-        GridVector grid = nine_grid(tile_coord, tiles);
+        GridVector grid = nine_grid(tile_coord, tiles, update_input);
         auto result = op(bucket, update_input, update_lut, grid);
         update_input = result.first;
 
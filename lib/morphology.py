@@ -11,6 +11,8 @@ dilation, erosion and blur
 """
 import logging
 
+import numpy as np
+
 import lib.mypaintlib as myplib
 
 import lib.fill_common as fc
@@ -18,9 +20,20 @@ from lib.fill_common import _FULL_TILE, _EMPTY_TILE
 
 N = myplib.TILE_SIZE
 
+# Offsets of the eight tiles adjacent to a tile
+_ADJ_OFFSETS = np.array([
+    (0, -1), (1, 0), (0, 1), (-1, 0),
+    (1, -1), (1, 1), (-1, 1), (-1, -1),
+], dtype=np.int64)
+
 logger = logging.getLogger(__name__)
 
 
+def _packed(coords):
+    """ Pack an (M, 2) array of tile coordinates into single int64 keys"""
+    return (coords[:, 0] << 32) + coords[:, 1]
+
+
 def adjacent_tiles(tile_coord, filled):
     """ Return a tuple of tiles adjacent to the input tile coordinate.
     Adjacent tiles that are not in the tileset are replaced by the empty tile.
@@ -35,12 +48,13 @@ def complement_adjacent(tiles):
     The new set should only be used as input to tile operations, as the empty
     tile is readonly.
     """
-    new = {}
-    for tile_coord in tiles.keys():
-        for adj_coord in fc.adjacent(tile_coord):
-            if adj_coord not in tiles and adj_coord not in new:
-                new[adj_coord] = _EMPTY_TILE
-    tiles.update(new)
+    if not tiles:
+        return
+    coords = np.array(list(tiles.keys()), dtype=np.int64)
+    adjacent = (coords[:, np.newaxis, :] + _ADJ_OFFSETS).reshape(-1, 2)
+    adj_keys, unique = np.unique(_packed(adjacent), return_index=True)
+    missing = adjacent[unique[~np.isin(adj_keys, _packed(coords))]]
+    tiles.update(dict.fromkeys(map(tuple, missing.tolist()), _EMPTY_TILE))
 
 
 def directly_below(coord1, coord2):
@@ -63,32 +77,50 @@ def strand_partition(tiles, dilating=False):
     to true, just being fully opaque is enough.
     :return: (final_dict, strands_list)
     """
-    # Dict of coord->tile for tiles that need no further processing
-    final_tiles = {}
-    # Groups of contiguous tile coordinates
-    strands = []
-    strand = []
-    previous = None
-    coords = tiles.keys()
-    for tile_coord in sorted(coords):
-        is_full_tile = tiles[tile_coord] is _FULL_TILE
-        if is_full_tile and (dilating or adj_full(tile_coord, tiles)):
-            # Tile needs no processing
-            final_tiles[tile_coord] = _FULL_TILE
-            previous = None
-            if strand:
-                strands.append(strand)
-                strand = []
-        elif previous is None or directly_below(tile_coord, previous):
-            # Either beginning of new strand, or adds to existing one
-            strand.append(tile_coord)
-        else:
-            # Neither final, nor contiguous, begin new strand
-            strands.append(strand)
-            strand = [tile_coord]
-        previous = tile_coord
-    if strand:
-        strands.append(strand)
+    if not tiles:
+        return {}, []
+    keys = list(tiles.keys())
+    full = np.fromiter(
+        (t is _FULL_TILE for t in tiles.values()), bool, len(keys)
+    )
+    # Packed keys order by column, then by row within each column,
+    # so a single sort of one integer array suffices.
+    coords = np.array(keys, dtype=np.int64)
+    packed = _packed(coords)
+    order = np.argsort(packed)
+    packed = packed[order]
+    coords = coords[order]
+    full = full[order]
+    keys = [keys[i] for i in order]
+
+    # Tiles needing no processing
+    if dilating:
+        final = full
+    else:
+        # Mark full tiles in a dense grid with an empty one-tile border;
+        # a tile is final if its whole 3x3 neighbourhood is marked.
+        xs = coords[:, 0] - coords[:, 0].min() + 1
+        ys = coords[:, 1] - coords[:, 1].min() + 1
+        h, w = ys.max() + 2, xs.max() + 2
+        grid = np.zeros((h, w), bool)
+        grid[ys[full], xs[full]] = True
+        nbhd = grid[1:-1, 1:-1].copy()
+        for dx, dy in _ADJ_OFFSETS:
+            nbhd &= grid[1+dy:h-1+dy, 1+dx:w-1+dx]
+        final = nbhd[ys - 1, xs - 1]
+    final_tiles = dict.fromkeys(
+        [keys[i] for i in np.flatnonzero(final)], _FULL_TILE
+    )
+
+    # A strand starts at every remaining tile that is not directly
+    # below the previous tile, or whose previous tile is final
+    keep = ~final
+    starts = np.ones(len(keys), bool)
+    starts[1:] = ~(keep[:-1] & (np.diff(packed) == 1))
+    kept = np.flatnonzero(keep)
+    kept_keys = [keys[i] for i in kept]
+    bounds = np.flatnonzero(starts[kept]).tolist() + [len(kept_keys)]
+    strands = [kept_keys[b:e] for b, e in zip(bounds, bounds[1:])]
     return final_tiles, strands
 
 
@@ -96,6 +128,9 @@ def morph(handler, offset, tiles):
     """ Either dilate or erode the given set of alpha tiles, depending
     on the sign of the offset, returning the set of morphed tiles.
     """
+    if offset == 0 or not tiles:
+        return tiles
+
     # When dilating, create new tiles to account for edge overflow
     # (without checking if they are actually needed)
     if offset > 0:
@@ -106,20 +141,26 @@ def morph(handler, offset, tiles):
     # Split up the coordinates of the tiles to morph, into vertically
     # contiguous strands, which can be processed more efficiently
     morphed, strands = strand_partition(tiles, offset > 0)
-    # Run the morph operation (C++, conditionally threaded)
-    myplib.morph(offset, morphed, tiles, strands, handler.controller)
+    # Run the morph operation (C++, conditionally threaded),
+    # unless all tiles are already final
+    if strands:
+        myplib.morph(offset, morphed, tiles, strands, handler.controller)
     return morphed
 
 
 def blur(handler, radius, tiles):
     """ Return the set of blurred tiles based on the input tiles.
     """
+    if radius <= 0 or not tiles:
+        return tiles
+
     complement_adjacent(tiles)
 
     handler.set_stage(handler.BLUR, len(tiles))
 
     blurred, strands = strand_partition(tiles, dilating=False)
-    myplib.blur(radius, blurred, tiles, strands, handler.controller)
+    if strands:
+        myplib.blur(radius, blurred, tiles, strands, handler.controller)
     return blurred
 
 